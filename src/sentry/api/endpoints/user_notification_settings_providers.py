@@ -1,4 +1,5 @@
 from django.db import router, transaction
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.request import Request
 from rest_framework.response import Response
@@ -61,26 +62,47 @@ class UserNotificationSettingsProvidersEndpoint(UserEndpoint):
             return self.respond(serializer.errors, status=400)
 
         data = serializer.validated_data
+        row_kwargs = {
+            "user_id": user.id,
+            "scope_type": data["scope_type"],
+            "scope_identifier": data["scope_identifier"],
+            "type": data["type"],
+        }
         new_rows = []
+        rows_to_update = []
+        rows_to_create = []
         with transaction.atomic(router.db_for_write(NotificationSettingProvider)):
+            existing_rows = {
+                row.provider: row
+                for row in NotificationSettingProvider.objects.select_for_update().filter(
+                    **row_kwargs, provider__in=PERSONAL_NOTIFICATION_PROVIDERS
+                )
+            }
+            now = timezone.now()
             for provider in PERSONAL_NOTIFICATION_PROVIDERS:
                 value = (
                     NotificationSettingsOptionEnum.ALWAYS.value
                     if provider in data["providers"]
                     else NotificationSettingsOptionEnum.NEVER.value
                 )
-                (
-                    notification_setting_provider,
-                    _,
-                ) = NotificationSettingProvider.objects.update_or_create(
-                    user_id=user.id,
-                    scope_type=data["scope_type"],
-                    scope_identifier=data["scope_identifier"],
-                    type=data["type"],
-                    provider=provider,
-                    defaults={"value": value},
-                )
+                notification_setting_provider = existing_rows.get(provider)
+                if notification_setting_provider is None:
+                    notification_setting_provider = NotificationSettingProvider(
+                        **row_kwargs, provider=provider, value=value
+                    )
+                    rows_to_create.append(notification_setting_provider)
+                else:
+                    notification_setting_provider.value = value
+                    notification_setting_provider.date_updated = now
+                    rows_to_update.append(notification_setting_provider)
                 new_rows.append(notification_setting_provider)
+
+            if rows_to_update:
+                NotificationSettingProvider.objects.bulk_update(
+                    rows_to_update, ["value", "date_updated"]
+                )
+            if rows_to_create:
+                NotificationSettingProvider.objects.bulk_create(rows_to_create)
         return Response(
             serialize(new_rows, request.user, NotificationSettingsProviderSerializer()),
             status=status.HTTP_201_CREATED,
@@ -133,13 +133,29 @@ def team_is_valid_recipient(team: Team | Actor) -> bool:
     for any one of the providers allowed for personal notifications.
     """
 
-    linked_integration = ExternalActorReplica.objects.filter(
+    return ExternalActorReplica.objects.filter(
         team_id=team.id,
         provider__in=PERSONAL_NOTIFICATION_PROVIDERS_AS_INT,
+    ).exists()
+
+
+def get_team_ids_with_linked_integration(team_ids: Iterable[int]) -> set[int]:
+    """
+    Batched version of `team_is_valid_recipient`: returns the subset of the given team IDs that
+    have a linked integration for any one of the providers allowed for personal notifications.
+    """
+    team_ids = set(team_ids)
+    if not team_ids:
+        return set()
+
+    return set(
+        ExternalActorReplica.objects.filter(
+            team_id__in=team_ids,
+            provider__in=PERSONAL_NOTIFICATION_PROVIDERS_AS_INT,
+        )
+        .values_list("team_id", flat=True)
+        .distinct()
     )
-    if linked_integration:
-        return True
-    return False
 
 
 def get_team_members(team: Team | Actor) -> list[Actor]:
@@ -154,10 +170,9 @@ def get_team_members(team: Team | Actor) -> list[Actor]:
     team_members = OrganizationMemberTeamReplica.objects.filter(team_id=team_id)
 
     # use the first member to get the org id + determine if there are any members to begin with
-    first_member = team_members.first()
-    if not first_member:
+    org_id = team_members.values_list("organization_id", flat=True).first()
+    if org_id is None:
         return []
-    org_id = first_member.organization_id
 
     # get user IDs for all members in the team
     members = OrganizationMemberMapping.objects.filter(
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from collections import defaultdict
 from collections.abc import Iterable, Mapping, MutableMapping
-from typing import Union
+from functools import cached_property
+from typing import TypeVar, Union
 
 from django.db.models import Q
 
@@ -18,11 +19,11 @@ from sentry.models.organizationmapping import OrganizationMapping
 from sentry.models.team import Team
 from sentry.notifications.helpers import (
     get_default_for_provider,
+    get_team_ids_with_linked_integration,
     get_team_members,
     get_type_defaults,
     recipient_is_team,
     recipient_is_user,
-    team_is_valid_recipient,
 )
 from sentry.notifications.models.notificationsettingoption import NotificationSettingOption
 from sentry.notifications.models.notificationsettingprovider import NotificationSettingProvider
@@ -35,24 +36,80 @@ from sentry.notifications.types import (
 from sentry.types.actor import Actor, ActorType
 from sentry.users.models.user import User
 from sentry.users.services.user.model import RpcUser
+from sentry.utils.request_cache import request_cache
 
 Recipient = Union[Actor, Team, RpcUser, User]
+SettingT = TypeVar("SettingT", NotificationSettingOption, NotificationSettingProvider)
 TEAM_NOTIFICATION_PROVIDERS = [ExternalProviderEnum.SLACK]
+# the only columns the controller reads when layering settings
+SETTING_OPTION_FIELDS = ("scope_type", "scope_identifier", "user", "team_id", "type", "value")
+SETTING_PROVIDER_FIELDS = SETTING_OPTION_FIELDS + ("provider",)
+
+
+SCOPE_SORT_ORDER = {
+    NotificationScopeEnum.PROJECT.value: 4,
+    NotificationScopeEnum.ORGANIZATION.value: 3,
+    NotificationScopeEnum.USER.value: 2,
+    NotificationScopeEnum.TEAM.value: 1,
+}
 
 
 def sort_settings_by_scope(setting: NotificationSettingOption | NotificationSettingProvider) -> int:
     """
     Sorts settings by scope type, with the most specific scope last.
     """
-    if setting.scope_type == NotificationScopeEnum.PROJECT.value:
-        return 4
-    if setting.scope_type == NotificationScopeEnum.ORGANIZATION.value:
-        return 3
-    if setting.scope_type == NotificationScopeEnum.USER.value:
-        return 2
-    if setting.scope_type == NotificationScopeEnum.TEAM.value:
-        return 1
-    return 0
+    return SCOPE_SORT_ORDER.get(setting.scope_type, 0)
+
+
+def group_settings_by_recipient(
+    settings: Iterable[SettingT],
+) -> Mapping[tuple[ActorType, int], list[SettingT]]:
+    """
+    Groups the settings by the user or team they belong to, with each group sorted by scope type
+    so the most specific scope is last.
+    """
+    settings_by_recipient: MutableMapping[tuple[ActorType, int], list[SettingT]] = defaultdict(list)
+    for setting in settings:
+        if setting.user_id is not None:
+            settings_by_recipient[(ActorType.USER, setting.user_id)].append(setting)
+        elif setting.team_id is not None:
+            settings_by_recipient[(ActorType.TEAM, setting.team_id)].append(setting)
+    for recipient_settings in settings_by_recipient.values():
+        recipient_settings.sort(key=sort_settings_by_scope)
+    return settings_by_recipient
+
+
+def get_recipient_key(recipient: Recipient) -> tuple[ActorType, int]:
+    if recipient_is_user(recipient):
+        return (ActorType.USER, recipient.id)
+    return (ActorType.TEAM, recipient.id)
+
+
+def split_recipient_ids(recipients: Iterable[Recipient]) -> tuple[list[int], list[int]]:
+    """
+    Splits the recipients into the IDs of the users and the IDs of the teams.
+    """
+    user_ids, team_ids = [], []
+    for recipient in recipients:
+        if recipient_is_user(recipient):
+            user_ids.append(recipient.id)
+        elif recipient_is_team(recipient):
+            team_ids.append(recipient.id)
+    return user_ids, team_ids
+
+
+@request_cache
+def has_team_workflow_notifications(organization_id: int) -> bool:
+    """
+    Returns whether the organization has team workflow notifications enabled. This is only
+    memoized while serving an HTTP request; request_cache is a no-op elsewhere (e.g. in tasks),
+    where NotificationController.has_team_workflow limits it to once per controller instead.
+    """
+    org_mapping = OrganizationMapping.objects.filter(organization_id=organization_id).first()
+    if org_mapping is None:
+        return False
+    org = serialize_organization_mapping(org_mapping)
+    return features.has("organizations:team-workflow-notifications", org)
 
 
 class NotificationController:
@@ -67,45 +124,66 @@ class NotificationController:
         type: NotificationSettingEnum | None = None,
         provider: ExternalProviderEnum | None = None,
     ) -> None:
-        self.project_ids = project_ids
+        # materialize once so the ids can be counted and iterated repeatedly
+        self.project_ids = list(project_ids) if project_ids is not None else None
         self.organization_id = organization_id
         self.type = type
         self.provider = provider
 
-        if organization_id is not None:
-            org_mapping = OrganizationMapping.objects.filter(
-                organization_id=organization_id
-            ).first()
-            org = serialize_organization_mapping(org_mapping) if org_mapping is not None else None
-        else:
-            org = None
-        if org and features.has("organizations:team-workflow-notifications", org):
+        recipients = list(recipients)
+        user_ids, team_ids = split_recipient_ids(recipients)
+        # only teams are affected by the flag, so skip the lookup when there are none
+        if team_ids and self.has_team_workflow:
+            # check every team for a linked integration in a single query
+            valid_team_ids = get_team_ids_with_linked_integration(team_ids)
             self.recipients: list[Recipient] = []
+            expanded_teams = False
             for recipient in recipients:
-                if recipient_is_team(recipient):
-                    if team_is_valid_recipient(recipient):
-                        self.recipients.append(recipient)
-                    else:
-                        self.recipients += get_team_members(recipient)
+                if recipient_is_team(recipient) and recipient.id not in valid_team_ids:
+                    self.recipients += get_team_members(recipient)
+                    expanded_teams = True
                 else:
                     self.recipients.append(recipient)
+            # teams without a linked integration were replaced by their members
+            if expanded_teams:
+                user_ids, team_ids = split_recipient_ids(self.recipients)
         else:
-            self.recipients = list(recipients)
+            self.recipients = recipients
+
+        self._user_ids, self._team_ids = user_ids, team_ids
 
         if self.recipients:
             query = self._get_query()
-            type_filter = Q(type=self.type.value) if self.type else Q()
-            provider_filter = Q(provider=self.provider.value) if self.provider else Q()
+            # plain equality filters don't need to be combined into the Q tree
+            filter_kwargs: MutableMapping[str, str] = {}
+            if self.type:
+                filter_kwargs["type"] = self.type.value
             self._setting_options = list(
-                NotificationSettingOption.objects.filter(query & type_filter)
+                NotificationSettingOption.objects.filter(query, **filter_kwargs).only(
+                    *SETTING_OPTION_FIELDS
+                )
             )
+            if self.provider:
+                filter_kwargs["provider"] = self.provider.value
             self._setting_providers = list(
-                NotificationSettingProvider.objects.filter(query & type_filter & provider_filter)
+                NotificationSettingProvider.objects.filter(query, **filter_kwargs).only(
+                    *SETTING_PROVIDER_FIELDS
+                )
             )
         else:
             self._setting_options = []
             self._setting_providers = []
 
+    @cached_property
+    def has_team_workflow(self) -> bool:
+        """
+        Evaluated at most once per controller, since the request cache doesn't apply outside of
+        requests (e.g. when sending notifications from tasks).
+        """
+        return self.organization_id is not None and has_team_workflow_notifications(
+            self.organization_id
+        )
+
     @property
     def get_all_setting_options(self) -> Iterable[NotificationSettingOption]:
         return self._setting_options
@@ -126,13 +204,7 @@ class NotificationController:
         if not self.recipients:
             raise Exception("recipient, team_ids, or user_ids must be provided")
 
-        user_ids, team_ids = [], []
-        for recipient in self.recipients:
-            if recipient_is_user(recipient):
-                user_ids.append(recipient.id)
-            elif recipient_is_team(recipient):
-                team_ids.append(recipient.id)
-
+        user_ids, team_ids = self._user_ids, self._team_ids
         if not user_ids and not team_ids:
             raise Exception("recipients must be either user or team")
 
@@ -212,7 +284,7 @@ class NotificationController:
         Args:
             setting_type: If specified, only return settings of this type.
         """
-        if self.project_ids and len(list(self.project_ids)) > 1 and not project_id:
+        if self.project_ids and len(self.project_ids) > 1 and not project_id:
             raise Exception("Must specify project_id if controller has more than 1 projects")
 
         most_specific_setting_options: MutableMapping[
@@ -223,24 +295,19 @@ class NotificationController:
             )  # Use lambda to return the default enum value
         )
 
+        project_scope = NotificationScopeEnum.PROJECT.value
+        type_defaults = get_type_defaults()
+        # group the settings once instead of scanning all of them for every recipient
+        settings_by_recipient = group_settings_by_recipient(self._filter_options(**kwargs))
         for recipient in self.recipients:
             # get the settings for this user/team
-            filter_kwargs = kwargs.copy()
-            if recipient_is_user(recipient):
-                filter_kwargs["user_id"] = recipient.id
-            elif recipient_is_team(recipient):
-                filter_kwargs["team_id"] = recipient.id
-            local_settings = self._filter_options(**filter_kwargs)
-            local_settings.sort(key=sort_settings_by_scope)
+            local_settings = settings_by_recipient.get(get_recipient_key(recipient), [])
             most_specific_recipient_options = most_specific_setting_options[recipient]
 
             for setting in local_settings:
                 # if we have a project_id, make sure the setting is for that project since
                 # the controller can be scoped for multiple projects
-                if (
-                    project_id is not None
-                    and setting.scope_type == NotificationScopeEnum.PROJECT.value
-                ):
+                if project_id is not None and setting.scope_type == project_scope:
                     if setting.scope_identifier != project_id:
                         continue
 
@@ -250,7 +317,7 @@ class NotificationController:
                 )
 
             # if we have no settings for this user/team, use the defaults
-            for type, default in get_type_defaults().items():
+            for type, default in type_defaults.items():
                 if type not in most_specific_recipient_options:
                     most_specific_recipient_options[type] = default
         return most_specific_setting_options
@@ -270,7 +337,7 @@ class NotificationController:
         Returns a mapping of the most specific notification setting providers for the given recipients and scopes.
         Note that this includes default settings for any notification types that are not set.
         """
-        if self.project_ids and len(list(self.project_ids)) > 2 and not project_id:
+        if self.project_ids and len(self.project_ids) > 2 and not project_id:
             raise Exception("Must specify project_id if controller has more than 2 projects")
 
         # Now, define your variable using the outermost defaultdict
@@ -288,34 +355,31 @@ class NotificationController:
             )
         )
 
-        if self.organization_id is not None:
-            org_mapping = OrganizationMapping.objects.filter(
-                organization_id=self.organization_id
-            ).first()
-            org = serialize_organization_mapping(org_mapping) if org_mapping is not None else None
-        else:
-            org = None
-        has_team_workflow = org and features.has("organizations:team-workflow-notifications", org)
+        has_team_workflow = bool(self._team_ids) and self.has_team_workflow
 
+        # the defaults only depend on the type and provider, so resolve them once up front
+        provider_defaults = [
+            (
+                type,
+                provider_str,
+                get_default_for_provider(type, ExternalProviderEnum(provider_str)),
+            )
+            for type in NotificationSettingEnum
+            for provider_str in PERSONAL_NOTIFICATION_PROVIDERS
+        ]
+
+        project_scope = NotificationScopeEnum.PROJECT.value
+        # group the settings once instead of scanning all of them for every recipient
+        settings_by_recipient = group_settings_by_recipient(self._filter_providers(**kwargs))
         for recipient in self.recipients:
             # get the settings for this user/team
-            filter_kwargs = kwargs.copy()
-            if recipient_is_user(recipient):
-                filter_kwargs["user_id"] = recipient.id
-            elif recipient_is_team(recipient):
-                filter_kwargs["team_id"] = recipient.id
-
-            local_settings = self._filter_providers(**filter_kwargs)
-            local_settings.sort(key=sort_settings_by_scope)
+            local_settings = settings_by_recipient.get(get_recipient_key(recipient), [])
 
             most_specific_recipient_providers = most_specific_setting_providers[recipient]
             for setting in local_settings:
                 # if we have a project_id, make sure the setting is for that project since
                 # the controller can be scoped for multiple projects
-                if (
-                    project_id is not None
-                    and setting.scope_type == NotificationScopeEnum.PROJECT.value
-                ):
+                if project_id is not None and setting.scope_type == project_scope:
                     if setting.scope_identifier != project_id:
                         continue
                 # sort the settings by scope type, with the most specific scope last so we override with the most specific value
@@ -324,19 +388,13 @@ class NotificationController:
                 ] = NotificationSettingsOptionEnum(setting.value)
 
             # if we have no settings for this user, use the defaults
-            for type in NotificationSettingEnum:
-                for provider_str in PERSONAL_NOTIFICATION_PROVIDERS:
-                    provider = ExternalProviderEnum(provider_str)
-                    if provider_str not in most_specific_recipient_providers[type]:
-                        # TODO(jangjodi): Remove this once the flag is removed
-                        if recipient_is_team(recipient) and (not has_team_workflow):
-                            most_specific_recipient_providers[type][
-                                provider_str
-                            ] = NotificationSettingsOptionEnum.NEVER
-                        else:
-                            most_specific_recipient_providers[type][provider_str] = (
-                                get_default_for_provider(type, provider)
-                            )
+            # TODO(jangjodi): Remove this once the flag is removed
+            disable_by_default = recipient_is_team(recipient) and (not has_team_workflow)
+            for type, provider_str, default in provider_defaults:
+                if provider_str not in most_specific_recipient_providers[type]:
+                    most_specific_recipient_providers[type][provider_str] = (
+                        NotificationSettingsOptionEnum.NEVER if disable_by_default else default
+                    )
 
         return most_specific_setting_providers
 
@@ -367,7 +425,6 @@ class NotificationController:
         types_to_search = [type] if type else list(NotificationSettingEnum)
 
         setting_options_map = self._get_layered_setting_options(project_id=project_id, **kwargs)
-        setting_providers_map = self._get_layered_setting_providers(project_id=project_id, **kwargs)
 
         result: MutableMapping[
             Recipient,
@@ -382,6 +439,17 @@ class NotificationController:
                 )  # Use lambda to return the default enum value
             )
         )
+        never = NotificationSettingsOptionEnum.NEVER
+        # if every recipient has disabled every type we're looking for, no provider can be enabled
+        # so skip layering the provider settings entirely
+        if all(
+            recipient_options_map[type] == never
+            for recipient_options_map in setting_options_map.values()
+            for type in types_to_search
+        ):
+            return result
+
+        setting_providers_map = self._get_layered_setting_providers(project_id=project_id, **kwargs)
         for recipient, recipient_options_map in setting_options_map.items():
             # check actor type against recipient type
             if actor_type:
@@ -392,12 +460,12 @@ class NotificationController:
 
             for type in types_to_search:
                 option_value = recipient_options_map[type]
-                if option_value == NotificationSettingsOptionEnum.NEVER:
+                if option_value == never:
                     continue
 
                 provider_options_map = setting_providers_map[recipient][type]
                 for provider, provider_value in provider_options_map.items():
-                    if provider_value == NotificationSettingsOptionEnum.NEVER:
+                    if provider_value == never:
                         continue
                     # use the option value here as it has more specific information
                     result[recipient][type][provider] = option_value
@@ -420,12 +488,13 @@ class NotificationController:
         combined_settings = self.get_combined_settings(
             type=type, actor_type=actor_type, project_id=project_id
         )
+        never = NotificationSettingsOptionEnum.NEVER
         recipients: Mapping[ExternalProviders, set[Actor]] = defaultdict(set)
         for recipient, type_map in combined_settings.items():
             actor = Actor.from_object(recipient)
             for type, provider_map in type_map.items():
                 for provider, value in provider_map.items():
-                    if value == NotificationSettingsOptionEnum.NEVER:
+                    if value == never:
                         continue
 
                     recipients[EXTERNAL_PROVIDERS_REVERSE_VALUES[provider]].add(actor)
@@ -554,12 +623,14 @@ class NotificationController:
         if not provider:
             raise Exception("Must specify provider")
 
+        provider_str = provider.value
+        always = NotificationSettingsOptionEnum.ALWAYS.value
         settings = self.get_all_setting_providers
         for setting in settings:
-            if setting.provider != provider.value:
+            if setting.provider != provider_str:
                 continue
 
-            if setting.value == NotificationSettingsOptionEnum.ALWAYS.value:
+            if setting.value == always:
                 return True
 
         return False
@@ -3,6 +3,7 @@ from __future__ import annotations
 from collections.abc import Mapping, MutableMapping
 
 from django.db import router, transaction
+from django.db.models import QuerySet
 
 from sentry.integrations.types import EXTERNAL_PROVIDERS, ExternalProviderEnum, ExternalProviders
 from sentry.notifications.models.notificationsettingoption import NotificationSettingOption
@@ -20,6 +21,35 @@ from sentry.users.models.user import User
 from sentry.users.services.user.service import user_service
 
 
+def _raw_delete_settings(
+    queryset: QuerySet[NotificationSettingOption] | QuerySet[NotificationSettingProvider],
+) -> None:
+    """
+    Nothing references the notification setting tables and they have no delete side effects, so
+    skip the deletion collector (which selects every row before deleting it) and issue a single
+    DELETE. Unfiltered querysets are ignored so this can never wipe a whole table.
+    """
+    if not queryset.query.where:
+        return
+    queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+def _remove_notification_settings_for_scope(
+    *, scope_type: NotificationScopeEnum, scope_identifier: int
+) -> None:
+    """
+    Removes both the option and provider settings for the given scope.
+    """
+    with transaction.atomic(router.db_for_write(NotificationSettingOption)):
+        for model in (NotificationSettingOption, NotificationSettingProvider):
+            _raw_delete_settings(
+                model.objects.filter(
+                    scope_type=scope_type.value,
+                    scope_identifier=scope_identifier,
+                )
+            )
+
+
 class DatabaseBackedNotificationsService(NotificationsService):
     def enable_all_settings_for_provider(
         self,
@@ -43,19 +73,38 @@ class DatabaseBackedNotificationsService(NotificationsService):
             kwargs["scope_type"] = NotificationScopeEnum.TEAM.value
             kwargs["scope_identifier"] = team_id
 
+        # check the type if it's an input
+        type_values = [
+            type_enum.value
+            for type_enum in NotificationSettingEnum
+            if not types or type_enum in types
+        ]
+        value = NotificationSettingsOptionEnum.ALWAYS.value
+
+        # The unique constraint spans the nullable user_id/team_id columns, so we can't rely on
+        # ON CONFLICT here. Instead update the existing rows in one statement and bulk insert
+        # the missing ones, rather than upserting each type individually.
         with transaction.atomic(router.db_for_write(NotificationSettingProvider)):
-            for type_enum in NotificationSettingEnum:
-                # check the type if it's an input
-                if types and type_enum not in types:
-                    continue
-                NotificationSettingProvider.objects.create_or_update(
-                    **kwargs,
-                    provider=external_provider.value,
-                    type=type_enum.value,
-                    values={
-                        "value": NotificationSettingsOptionEnum.ALWAYS.value,
-                    },
-                )
+            existing_settings = NotificationSettingProvider.objects.filter(
+                **kwargs,
+                provider=external_provider.value,
+                type__in=type_values,
+            )
+            existing_types = set(existing_settings.values_list("type", flat=True))
+            if existing_types:
+                existing_settings.update(value=value)
+            NotificationSettingProvider.objects.bulk_create(
+                [
+                    NotificationSettingProvider(
+                        **kwargs,
+                        provider=external_provider.value,
+                        type=type_value,
+                        value=value,
+                    )
+                    for type_value in type_values
+                    if type_value not in existing_types
+                ]
+            )
 
     def update_notification_options(
         self,
@@ -88,30 +137,22 @@ class DatabaseBackedNotificationsService(NotificationsService):
         # skip if not a supported provider with settings
         if provider not in EXTERNAL_PROVIDERS:
             return
-        NotificationSettingProvider.objects.filter(
-            team_id=team_id, provider=EXTERNAL_PROVIDERS[provider]
-        ).delete()
+        _raw_delete_settings(
+            NotificationSettingProvider.objects.filter(
+                team_id=team_id, provider=EXTERNAL_PROVIDERS[provider]
+            )
+        )
 
     def remove_notification_settings_for_organization(self, *, organization_id: int) -> None:
         assert organization_id, "organization_id must be a positive integer"
-        NotificationSettingOption.objects.filter(
-            scope_type=NotificationScopeEnum.ORGANIZATION.value,
-            scope_identifier=organization_id,
-        ).delete()
-        NotificationSettingProvider.objects.filter(
-            scope_type=NotificationScopeEnum.ORGANIZATION.value,
-            scope_identifier=organization_id,
-        ).delete()
+        _remove_notification_settings_for_scope(
+            scope_type=NotificationScopeEnum.ORGANIZATION, scope_identifier=organization_id
+        )
 
     def remove_notification_settings_for_project(self, *, project_id: int) -> None:
-        NotificationSettingOption.objects.filter(
-            scope_type=NotificationScopeEnum.PROJECT.value,
-            scope_identifier=project_id,
-        ).delete()
-        NotificationSettingProvider.objects.filter(
-            scope_type=NotificationScopeEnum.PROJECT.value,
-            scope_identifier=project_id,
-        ).delete()
+        _remove_notification_settings_for_scope(
+            scope_type=NotificationScopeEnum.PROJECT, scope_identifier=project_id
+        )
 
     def subscriptions_for_projects(
         self,
@@ -167,7 +208,8 @@ class DatabaseBackedNotificationsService(NotificationsService):
     def get_users_for_weekly_reports(
         self, *, organization_id: int, user_ids: list[int]
     ) -> list[int]:
-        users = User.objects.filter(id__in=user_ids)
+        # the controller only needs the ids of the users
+        users = User.objects.filter(id__in=user_ids).only("id")
         controller = NotificationController(
             recipients=users,
             organization_id=organization_id,
@@ -128,6 +128,42 @@ class UserNotificationSettingsProvidersPutTest(UserNotificationSettingsProviders
         ).exists()
         assert len(response.data) == 3
 
+    def test_updates_existing_rows(self):
+        existing = NotificationSettingProvider.objects.create(
+            user_id=self.user.id,
+            scope_type=NotificationScopeEnum.ORGANIZATION.value,
+            scope_identifier=self.organization.id,
+            type=NotificationSettingEnum.ISSUE_ALERTS.value,
+            provider=ExternalProviderEnum.SLACK.value,
+            value=NotificationSettingsOptionEnum.ALWAYS.value,
+        )
+        response = self.get_success_response(
+            "me",
+            user_id=self.user.id,
+            scope_type="organization",
+            scope_identifier=self.organization.id,
+            type="alerts",
+            status_code=status.HTTP_201_CREATED,
+            providers=["email"],
+        )
+        assert len(response.data) == 3
+        existing.refresh_from_db()
+        assert existing.value == NotificationSettingsOptionEnum.NEVER.value
+        assert (
+            NotificationSettingProvider.objects.filter(
+                user_id=self.user.id,
+                scope_type=NotificationScopeEnum.ORGANIZATION.value,
+                scope_identifier=self.organization.id,
+                type=NotificationSettingEnum.ISSUE_ALERTS.value,
+            ).count()
+            == 3
+        )
+        assert NotificationSettingProvider.objects.filter(
+            user_id=self.user.id,
+            provider=ExternalProviderEnum.EMAIL.value,
+            value=NotificationSettingsOptionEnum.ALWAYS.value,
+        ).exists()
+
     def test_invalid_scope_type(self):
         response = self.get_error_response(
             "me",
@@ -0,0 +1,179 @@
+from sentry.integrations.types import ExternalProviderEnum, ExternalProviders
+from sentry.notifications.models.notificationsettingoption import NotificationSettingOption
+from sentry.notifications.models.notificationsettingprovider import NotificationSettingProvider
+from sentry.notifications.services import notifications_service
+from sentry.notifications.services.impl import _raw_delete_settings
+from sentry.notifications.types import (
+    NotificationScopeEnum,
+    NotificationSettingEnum,
+    NotificationSettingsOptionEnum,
+)
+from sentry.testutils.cases import TestCase
+from sentry.testutils.silo import control_silo_test
+
+
+@control_silo_test
+class DatabaseBackedNotificationsServiceTest(TestCase):
+    def create_user_provider_setting(self, type, value):
+        return NotificationSettingProvider.objects.create(
+            user_id=self.user.id,
+            scope_type=NotificationScopeEnum.USER.value,
+            scope_identifier=self.user.id,
+            provider=ExternalProviderEnum.SLACK.value,
+            type=type.value,
+            value=value.value,
+        )
+
+    def create_setting_option(self, scope_type, scope_identifier, **kwargs):
+        kwargs.setdefault("user_id", self.user.id)
+        return NotificationSettingOption.objects.create(
+            scope_type=scope_type.value,
+            scope_identifier=scope_identifier,
+            type=NotificationSettingEnum.ISSUE_ALERTS.value,
+            value=NotificationSettingsOptionEnum.ALWAYS.value,
+            **kwargs,
+        )
+
+    def create_setting_provider(
+        self, scope_type, scope_identifier, provider=ExternalProviderEnum.SLACK, **kwargs
+    ):
+        kwargs.setdefault("user_id", self.user.id)
+        return NotificationSettingProvider.objects.create(
+            scope_type=scope_type.value,
+            scope_identifier=scope_identifier,
+            provider=provider.value,
+            type=NotificationSettingEnum.ISSUE_ALERTS.value,
+            value=NotificationSettingsOptionEnum.ALWAYS.value,
+            **kwargs,
+        )
+
+    def assert_remaining_settings(self, options, providers):
+        assert set(NotificationSettingOption.objects.all()) == set(options)
+        assert set(NotificationSettingProvider.objects.all()) == set(providers)
+
+    def test_remove_notification_settings_for_organization(self):
+        other_organization = self.create_organization()
+        self.create_setting_option(NotificationScopeEnum.ORGANIZATION, self.organization.id)
+        self.create_setting_provider(NotificationScopeEnum.ORGANIZATION, self.organization.id)
+        other_org_option = self.create_setting_option(
+            NotificationScopeEnum.ORGANIZATION, other_organization.id
+        )
+        other_org_provider = self.create_setting_provider(
+            NotificationScopeEnum.ORGANIZATION, other_organization.id
+        )
+        # same identifier, different scope
+        project_option = self.create_setting_option(
+            NotificationScopeEnum.PROJECT, self.organization.id
+        )
+        project_provider = self.create_setting_provider(
+            NotificationScopeEnum.PROJECT, self.organization.id
+        )
+
+        notifications_service.remove_notification_settings_for_organization(
+            organization_id=self.organization.id
+        )
+
+        self.assert_remaining_settings(
+            options=[other_org_option, project_option],
+            providers=[other_org_provider, project_provider],
+        )
+
+    def test_remove_notification_settings_for_project(self):
+        other_project = self.create_project()
+        self.create_setting_option(NotificationScopeEnum.PROJECT, self.project.id)
+        self.create_setting_provider(NotificationScopeEnum.PROJECT, self.project.id)
+        other_project_option = self.create_setting_option(
+            NotificationScopeEnum.PROJECT, other_project.id
+        )
+        other_project_provider = self.create_setting_provider(
+            NotificationScopeEnum.PROJECT, other_project.id
+        )
+        # same identifier, different scope
+        org_option = self.create_setting_option(NotificationScopeEnum.ORGANIZATION, self.project.id)
+        org_provider = self.create_setting_provider(
+            NotificationScopeEnum.ORGANIZATION, self.project.id
+        )
+
+        notifications_service.remove_notification_settings_for_project(project_id=self.project.id)
+
+        self.assert_remaining_settings(
+            options=[other_project_option, org_option],
+            providers=[other_project_provider, org_provider],
+        )
+
+    def test_remove_notification_settings_for_provider_team(self):
+        other_team = self.create_team()
+        team_option = self.create_setting_option(
+            NotificationScopeEnum.TEAM, self.team.id, user_id=None, team_id=self.team.id
+        )
+        self.create_setting_provider(
+            NotificationScopeEnum.TEAM, self.team.id, user_id=None, team_id=self.team.id
+        )
+        self.create_setting_provider(
+            NotificationScopeEnum.PROJECT, self.project.id, user_id=None, team_id=self.team.id
+        )
+        email_provider = self.create_setting_provider(
+            NotificationScopeEnum.TEAM,
+            self.team.id,
+            provider=ExternalProviderEnum.EMAIL,
+            user_id=None,
+            team_id=self.team.id,
+        )
+        other_team_provider = self.create_setting_provider(
+            NotificationScopeEnum.TEAM, other_team.id, user_id=None, team_id=other_team.id
+        )
+
+        notifications_service.remove_notification_settings_for_provider_team(
+            team_id=self.team.id, provider=ExternalProviders.SLACK
+        )
+
+        self.assert_remaining_settings(
+            options=[team_option],
+            providers=[email_provider, other_team_provider],
+        )
+
+    def test_raw_delete_settings_ignores_unfiltered_querysets(self):
+        option = self.create_setting_option(NotificationScopeEnum.USER, self.user.id)
+        provider = self.create_setting_provider(NotificationScopeEnum.USER, self.user.id)
+
+        _raw_delete_settings(NotificationSettingOption.objects.all())
+        _raw_delete_settings(NotificationSettingProvider.objects.all())
+
+        self.assert_remaining_settings(options=[option], providers=[provider])
+
+    def test_enable_all_settings_for_provider(self):
+        existing = self.create_user_provider_setting(
+            NotificationSettingEnum.ISSUE_ALERTS, NotificationSettingsOptionEnum.NEVER
+        )
+        excluded = self.create_user_provider_setting(
+            NotificationSettingEnum.DEPLOY, NotificationSettingsOptionEnum.NEVER
+        )
+        types = [NotificationSettingEnum.ISSUE_ALERTS, NotificationSettingEnum.WORKFLOW]
+
+        # enabling twice must not insert duplicate rows
+        for _ in range(2):
+            notifications_service.enable_all_settings_for_provider(
+                external_provider=ExternalProviderEnum.SLACK,
+                user_id=self.user.id,
+                types=types,
+            )
+
+        existing.refresh_from_db()
+        assert existing.value == NotificationSettingsOptionEnum.ALWAYS.value
+
+        excluded.refresh_from_db()
+        assert excluded.value == NotificationSettingsOptionEnum.NEVER.value
+
+        settings = NotificationSettingProvider.objects.filter(
+            user_id=self.user.id, provider=ExternalProviderEnum.SLACK.value
+        )
+        assert settings.count() == 3
+        workflow_settings = settings.filter(type=NotificationSettingEnum.WORKFLOW.value)
+        assert workflow_settings.count() == 1
+        workflow_setting = workflow_settings.get()
+        assert workflow_setting.scope_type == NotificationScopeEnum.USER.value
+        assert workflow_setting.scope_identifier == self.user.id
+        assert workflow_setting.value == NotificationSettingsOptionEnum.ALWAYS.value
+        assert not settings.exclude(
+            type__in=[type.value for type in types + [NotificationSettingEnum.DEPLOY]]
+        ).exists()
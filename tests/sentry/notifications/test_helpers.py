@@ -7,6 +7,7 @@ from sentry.models.rule import Rule
 from sentry.notifications.helpers import (
     collect_groups_by_project,
     get_subscription_from_attributes,
+    get_team_ids_with_linked_integration,
     get_team_members,
     team_is_valid_recipient,
     validate,
@@ -179,3 +180,35 @@ class NotificationHelpersTest(TestCase):
             assert team_is_valid_recipient(team1)
             assert not team_is_valid_recipient(team2)
             assert not team_is_valid_recipient(team3)
+
+    def test_get_team_ids_with_linked_integration(self):
+        team1 = self.create_team(organization=self.organization)
+        team2 = self.create_team(organization=self.organization)
+        team3 = self.create_team(organization=self.organization)
+        integration1 = self.create_integration(
+            organization=self.organization, provider="Slack", external_id="slack-id"
+        )
+        integration2 = self.create_integration(
+            organization=self.organization, provider="Jira", external_id="jira-id"
+        )
+        ExternalActor.objects.create(
+            team_id=team1.id,
+            organization=self.organization,
+            integration_id=integration1.id,
+            external_name="valid_integration",
+            provider=110,
+        )
+        ExternalActor.objects.create(
+            team_id=team2.id,
+            organization=self.organization,
+            integration_id=integration2.id,
+            external_name="invalid_integration",
+            provider=0,
+        )
+        with assume_test_silo_mode(SiloMode.CONTROL):
+            assert get_team_ids_with_linked_integration([team1.id, team2.id, team3.id]) == {
+                team1.id
+            }
+            assert get_team_ids_with_linked_integration([team2.id, team3.id]) == set()
+            with self.assertNumQueries(0):
+                assert get_team_ids_with_linked_integration([]) == set()
@@ -1,9 +1,14 @@
+from unittest.mock import patch
+
 from sentry.integrations.models.external_actor import ExternalActor
 from sentry.integrations.types import ExternalProviderEnum, ExternalProviders
 from sentry.models.team import Team
 from sentry.notifications.models.notificationsettingoption import NotificationSettingOption
 from sentry.notifications.models.notificationsettingprovider import NotificationSettingProvider
-from sentry.notifications.notificationcontroller import NotificationController
+from sentry.notifications.notificationcontroller import (
+    NotificationController,
+    group_settings_by_recipient,
+)
 from sentry.notifications.types import (
     GroupSubscriptionStatus,
     NotificationScopeEnum,
@@ -219,6 +224,35 @@ class NotificationControllerTest(TestCase):
         )
         assert filtered_providers == [self.setting_providers[0]]
 
+    def test_group_settings_by_recipient(self):
+        other_user = self.create_user()
+        other_user_option = add_notification_setting_option(
+            scope_type=NotificationScopeEnum.USER,
+            scope_identifier=other_user.id,
+            type=NotificationSettingEnum.DEPLOY,
+            value=NotificationSettingsOptionEnum.NEVER,
+            user_id=other_user.id,
+        )
+        team_option = add_notification_setting_option(
+            scope_type=NotificationScopeEnum.TEAM,
+            scope_identifier=self.team.id,
+            type=NotificationSettingEnum.DEPLOY,
+            value=NotificationSettingsOptionEnum.ALWAYS,
+            team_id=self.team.id,
+        )
+
+        grouped = group_settings_by_recipient(
+            self.setting_options + [other_user_option, team_option]
+        )
+        # sorted by scope type, with the most specific scope last
+        assert grouped[(ActorType.USER, self.user.id)] == [
+            self.setting_options[0],
+            self.setting_options[2],
+            self.setting_options[1],
+        ]
+        assert grouped[(ActorType.USER, other_user.id)] == [other_user_option]
+        assert grouped[(ActorType.TEAM, self.team.id)] == [team_option]
+
     def test_layering(self):
         NotificationSettingOption.objects.all().delete()
         top_level_option = add_notification_setting_option(
@@ -562,6 +596,64 @@ class NotificationControllerTest(TestCase):
         assert recipients[ExternalProviders.EMAIL] == {rpc_user, rpc_new_user}
         assert recipients[ExternalProviders.MSTEAMS] == {rpc_new_user}
 
+    def test_get_combined_settings_all_recipients_disabled(self):
+        new_user = self.create_user()
+        for user in (self.user, new_user):
+            add_notification_setting_option(
+                scope_type=NotificationScopeEnum.USER,
+                scope_identifier=user.id,
+                type=NotificationSettingEnum.WORKFLOW,
+                value=NotificationSettingsOptionEnum.NEVER,
+                user_id=user.id,
+            )
+        controller = NotificationController(
+            recipients=[self.user, new_user],
+            organization_id=self.organization.id,
+        )
+
+        with patch.object(controller, "_get_layered_setting_providers") as mock_providers:
+            assert controller.get_combined_settings(type=NotificationSettingEnum.WORKFLOW) == {}
+            assert (
+                controller.get_notification_recipients(type=NotificationSettingEnum.WORKFLOW) == {}
+            )
+        mock_providers.assert_not_called()
+
+    def test_get_combined_settings_some_recipients_disabled(self):
+        new_user = self.create_user()
+        add_notification_setting_option(
+            scope_type=NotificationScopeEnum.USER,
+            scope_identifier=self.user.id,
+            type=NotificationSettingEnum.WORKFLOW,
+            value=NotificationSettingsOptionEnum.NEVER,
+            user_id=self.user.id,
+        )
+        controller = NotificationController(
+            recipients=[self.user, new_user],
+            organization_id=self.organization.id,
+        )
+
+        with patch.object(
+            controller,
+            "_get_layered_setting_providers",
+            wraps=controller._get_layered_setting_providers,
+        ) as mock_providers:
+            combined_settings = controller.get_combined_settings(
+                type=NotificationSettingEnum.WORKFLOW
+            )
+        mock_providers.assert_called_once()
+
+        assert self.user not in combined_settings
+        assert combined_settings[new_user] == {
+            NotificationSettingEnum.WORKFLOW: {
+                ExternalProviderEnum.EMAIL.value: NotificationSettingsOptionEnum.SUBSCRIBE_ONLY,
+                ExternalProviderEnum.SLACK.value: NotificationSettingsOptionEnum.SUBSCRIBE_ONLY,
+            }
+        }
+        assert controller.get_notification_recipients(type=NotificationSettingEnum.WORKFLOW) == {
+            ExternalProviders.EMAIL: {Actor.from_object(new_user)},
+            ExternalProviders.SLACK: {Actor.from_object(new_user)},
+        }
+
     def test_user_has_any_provider_settings(self):
         controller = NotificationController(
             recipients=[self.user],